@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+streaming_stats.py
+Fixed-memory, mergeable summaries for the live service, so we don't have to
+keep every article's cleaned_text around:
+  - SpaceSaving: approximate top terms (what plot_top_words shows)
+  - TDigest: approximate sentiment_score quantiles and mean (what alerting checks)
+  - HyperLogLog: approximate distinct counts (sources, authors)
+Every summary has a merge() so per-worker / per-day results can be combined.
+"""
+import bisect
+import hashlib
+import heapq
+import itertools
+import math
+
+# --- Configuration ---
+TOP_TERMS_CAPACITY = 500   # counters kept by SpaceSaving
+TDIGEST_COMPRESSION = 100  # higher = more accurate quantiles, more centroids
+HLL_PRECISION = 12         # 2**12 registers, ~1.6% standard error
+
+
+def _hash64(value):
+    """Stable 64-bit hash (Python's hash() is salted per process, so it can't be merged)."""
+    digest = hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _is_missing(value):
+    """True for None, NaN and blank strings (what pandas / csv give for empty cells)."""
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    return isinstance(value, str) and not value.strip()
+
+
+# Top terms
+class SpaceSaving:
+    """Space-Saving heavy hitters: at most `capacity` counters, counts overestimate by <= error."""
+
+    def __init__(self, capacity=TOP_TERMS_CAPACITY):
+        if capacity < 1:
+            raise ValueError("SpaceSaving capacity must be at least 1.")
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        # Min-heap of (count, seq, item); seq breaks ties so items never get compared.
+        # Entries whose count is out of date are skipped lazily.
+        self._heap = []
+        self._seq = itertools.count()
+
+    def _rebuild_heap(self):
+        self._heap = [(count, next(self._seq), item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def _push(self, item):
+        heapq.heappush(self._heap, (self.counts[item], next(self._seq), item))
+        if len(self._heap) > 2 * self.capacity:
+            # Drop stale entries; amortised O(1) per update
+            self._rebuild_heap()
+
+    def _pop_min_item(self):
+        while True:
+            count, _, item = heapq.heappop(self._heap)
+            if self.counts.get(item) == count:
+                return item
+
+    def update(self, item, count=1):
+        if item in self.counts:
+            self.counts[item] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+        else:
+            # Replace the smallest counter; the new item inherits its count as error
+            victim = self._pop_min_item()
+            floor = self.counts.pop(victim)
+            del self.errors[victim]
+            self.counts[item] = floor + count
+            self.errors[item] = floor
+        self._push(item)
+
+    def update_text(self, text):
+        """Count every word of an already cleaned (space separated) text."""
+        if not isinstance(text, str):
+            return
+        for word in text.split():
+            self.update(word)
+
+    def _floor(self):
+        # Upper bound on the count of any item that is not being tracked
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other):
+        """Combine with another summary (Agarwal et al. mergeable summaries)."""
+        if self.capacity != other.capacity:
+            raise ValueError("Cannot merge SpaceSaving summaries with different capacities.")
+        own_floor, other_floor = self._floor(), other._floor()
+        counts, errors = {}, {}
+        for item in set(self.counts) | set(other.counts):
+            counts[item] = self.counts.get(item, own_floor) + other.counts.get(item, other_floor)
+            errors[item] = self.errors.get(item, own_floor) + other.errors.get(item, other_floor)
+        keep = sorted(counts, key=counts.get, reverse=True)[:self.capacity]
+        self.counts = {item: counts[item] for item in keep}
+        self.errors = {item: errors[item] for item in keep}
+        self._rebuild_heap()
+        return self
+
+    def most_common(self, n=10):
+        """Same shape as Counter.most_common: [(word, estimated_count), ...]."""
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+
+
+# Sentiment quantiles
+class TDigest:
+    """Merging t-digest: approximate quantiles in O(compression) memory. Also tracks exact mean/min/max."""
+
+    def __init__(self, compression=TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.centroids = []  # sorted [mean, weight] pairs
+        self.buffer = []
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value, weight=1):
+        if _is_missing(value):
+            return
+        value = float(value)
+        self.buffer.append([value, weight])
+        self.count += weight
+        self.total += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= 5 * self.compression:
+            self._compress()
+
+    def _k(self, q):
+        # k1 scale function: small centroids near the tails, large ones in the middle
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self):
+        if not self.buffer:
+            return
+        points = sorted(self.centroids + self.buffer)
+        self.buffer = []
+        total = sum(w for _, w in points)
+        merged = [list(points[0])]
+        seen = 0.0
+        k_lower = self._k(0.0)
+        for mean, weight in points[1:]:
+            current = merged[-1]
+            q = (seen + current[1] + weight) / total
+            if self._k(min(q, 1.0)) - k_lower <= 1:
+                new_weight = current[1] + weight
+                current[0] += (mean - current[0]) * weight / new_weight
+                current[1] = new_weight
+            else:
+                seen += current[1]
+                k_lower = self._k(seen / total)
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        self.buffer.extend([list(c) for c in other.centroids + other.buffer])
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q):
+        """Estimated value at quantile q (0..1), or None if empty."""
+        self._compress()
+        if not self.centroids:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        # Interpolate between centroid midpoints (cumulative weight at each centroid's centre)
+        target = q * self.count
+        mids, cumulative = [], 0.0
+        for _, weight in self.centroids:
+            mids.append(cumulative + weight / 2)
+            cumulative += weight
+        means = [m for m, _ in self.centroids]
+        if target <= mids[0]:
+            return self.min + (means[0] - self.min) * target / mids[0]
+        if target >= mids[-1]:
+            tail = self.count - mids[-1]
+            return means[-1] + (self.max - means[-1]) * (target - mids[-1]) / tail if tail else means[-1]
+        i = bisect.bisect_right(mids, target) - 1
+        frac = (target - mids[i]) / (mids[i + 1] - mids[i])
+        return means[i] + (means[i + 1] - means[i]) * frac
+
+
+# Distinct counts
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2**precision one-byte registers."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError("HyperLogLog precision must be between 4 and 16.")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add(self, value):
+        if _is_missing(value):
+            return
+        h = _hash64(value)
+        index = h >> (64 - self.precision)
+        rest = h & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if self.precision != other.precision:
+            raise ValueError("Cannot merge HyperLogLogs with different precisions.")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = self.m
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+# Per-window summary
+class WindowStats:
+    """All the summaries for one time window (or worker). Merge windows to roll up hours into days."""
+
+    def __init__(self, capacity=TOP_TERMS_CAPACITY, compression=TDIGEST_COMPRESSION,
+                 precision=HLL_PRECISION):
+        self.top_terms = SpaceSaving(capacity)
+        self.sentiment = TDigest(compression)
+        self.sentiment_by_source = {}
+        self.sources = HyperLogLog(precision)
+        self.authors = HyperLogLog(precision)
+        self.compression = compression
+        self.articles = 0
+
+    def add_article(self, article):
+        """Add one article (dict or DataFrame row) with cleaned_text, source, author, sentiment_score.
+
+        None, NaN and blank strings are treated as missing; sentiment_score must otherwise be numeric.
+        """
+        self.articles += 1
+        self.top_terms.update_text(article.get("cleaned_text"))
+        source = article.get("source")
+        self.sources.add(source)
+        self.authors.add(article.get("author"))
+        score = article.get("sentiment_score")
+        if not _is_missing(score):
+            self.sentiment.update(score)
+            if not _is_missing(source):
+                self.sentiment_by_source.setdefault(source, TDigest(self.compression)).update(score)
+
+    def merge(self, other):
+        self.articles += other.articles
+        self.top_terms.merge(other.top_terms)
+        self.sentiment.merge(other.sentiment)
+        for source, digest in other.sentiment_by_source.items():
+            self.sentiment_by_source.setdefault(source, TDigest(self.compression)).merge(digest)
+        self.sources.merge(other.sources)
+        self.authors.merge(other.authors)
+        return self
+
+    def summary(self, n=10):
+        return {
+            "articles": self.articles,
+            "scored_articles": self.sentiment.count,
+            "top_terms": self.top_terms.most_common(n),
+            "avg_sentiment": self.sentiment.mean,
+            "sentiment_p10": self.sentiment.quantile(0.1),
+            "sentiment_median": self.sentiment.quantile(0.5),
+            "distinct_sources": self.sources.count(),
+            "distinct_authors": self.authors.count(),
+        }
+
+
+def stats_from_df(df, **kwargs):
+    """Build a WindowStats from a sentiment report DataFrame."""
+    stats = WindowStats(**kwargs)
+    for article in df.to_dict("records"):
+        stats.add_article(article)
+    return stats
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    INPUT_FILE = "news_sentiment_report_7day_mock.csv"
+    df = pd.read_csv(INPUT_FILE)
+    df["publishedAt"] = pd.to_datetime(df["publishedAt"])
+
+    # One summary per day, then merged - the same way workers would combine results
+    total = WindowStats()
+    for day, day_df in df.groupby(df["publishedAt"].dt.date):
+        total.merge(stats_from_df(day_df))
+        print(f"Merged window {day} ({len(day_df)} articles)")
+
+    for key, value in total.summary().items():
+        print(f"{key}: {value}")